@@ -1,25 +1,73 @@
+import asyncio
+import hashlib
+import json
 import os
-import requests
+import shelve
+import httpx
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from io import BytesIO
 from datetime import datetime
-from PIL import Image, ImageOps, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageOps
 
 from src.first_page import FirstPageGenerator
 from src.map_page import MapPageGenerator
 from src.wiki_page import WikiPageGenerator
 
+# Lookup table that binarizes and inverts grayscale pixels into a 1-bit image in a single pass
+BINARIZE_THRESHOLD = 128
+BINARIZE_INVERT_LUT = bytes(0 if p > BINARIZE_THRESHOLD else 255 for p in range(256))
+
+
+def _decode_page(page, image_data):
+    """
+    Decodes and binarizes a downloaded teletext image in a worker process.
+
+    Returns:
+        tuple or None: The image size and raw 1-bit bytes, or None if the image is unreadable.
+    """
+    try:
+        img = Image.open(BytesIO(image_data)).convert("L")
+    except Exception as exc:
+        print(f"Failed to open image for page {page}: {exc}")
+        return None
+
+    # Apply binarization and inversion
+    img = img.point(BINARIZE_INVERT_LUT, mode="1")
+    return img.size, img.tobytes()
+
 
 class DownloadTeletext:
     """Handles downloading and processing teletext images."""
 
     API_URL_TEMPLATE = "https://api-teletext.ceskatelevize.cz/pages/{page}/image.webp"
+    MAX_WORKERS = 16
+    UNIFORM_CACHE_PATH = os.path.join("data", ".uniform_cache")
+    HTTP_CACHE_PATH = os.path.join("data", ".http_cache.json")
+    PAGE_CACHE_DIR = os.path.join("data", ".page_cache")
 
-    def __init__(self, page_ranges=None):
+    def __init__(self, page_ranges=None, save_pngs=True):
         if page_ranges is None:
             page_ranges = [(100, 170), (600, 620)]  # Default ranges
         self.page_ranges = page_ranges
+        self.save_pngs = save_pngs
         self.saved_images = []
+        self.page_images = []
+        self.uniform_digests = set()
+        self.http_cache = {}
         self.pdf_path = None
+        self.font = self._load_font()
+        self.glyphs = {}
+        # All page labels share the same line height, so it is measured only once
+        _, top, _, bottom = self.font.getbbox("Page 000", mode="1")
+        self.text_height = bottom - top
+
+    def _load_font(self):
+        """Loads the page number font once so it is shared by all pages."""
+        try:
+            return ImageFont.truetype("arial.ttf", 12)
+        except OSError:
+            return ImageFont.load_default()
 
     def download_and_create_pdf(self):
         """
@@ -28,150 +76,259 @@ class DownloadTeletext:
         Returns:
             str or None: The file path to the created PDF if images were saved, otherwise None.
         """
-        self._create_data_folder()
-        folder_name, folder_name_images = self._setup_folders()
-        self._download_images(folder_name_images)
-        return self._create_pdf(folder_name)
-
-    def _create_data_folder(self):
-        """Ensures the data folder exists."""
-        if not os.path.isdir("data"):
-            os.makedirs("data")
+        now = datetime.now()
+        folder_name, folder_name_images = self._setup_folders(now)
+        self._load_http_cache()
+        with shelve.open(self.UNIFORM_CACHE_PATH) as uniform_cache:
+            self.uniform_digests = set(uniform_cache)
+            self._download_images(folder_name_images)
+            for digest in self.uniform_digests.difference(uniform_cache):
+                uniform_cache[digest] = True
+        self._save_http_cache()
+        return self._create_pdf(folder_name, now)
 
-    def _setup_folders(self):
+    def _setup_folders(self, now):
         """Creates timestamped folders for storing images and PDFs."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         folder_name = os.path.join("data", f"{timestamp}_teletext")
-        os.makedirs(folder_name, exist_ok=True)
         folder_name_images = os.path.join(folder_name, "images")
+        # Creates the data and timestamped parent folders as well
         os.makedirs(folder_name_images, exist_ok=True)
         return folder_name, folder_name_images
 
+    def _load_http_cache(self):
+        """Loads the ETag and Last-Modified headers remembered from previous runs."""
+        os.makedirs(self.PAGE_CACHE_DIR, exist_ok=True)
+        try:
+            with open(self.HTTP_CACHE_PATH, encoding="utf-8") as f:
+                self.http_cache = json.load(f)
+        except (OSError, ValueError):
+            self.http_cache = {}
+
+    def _save_http_cache(self):
+        """Persists the response headers used for conditional requests."""
+        with open(self.HTTP_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(self.http_cache, f, indent=2)
+
     def _download_images(self, folder_name_images):
-        """Downloads and processes teletext images for all ranges."""
-        for start, end in self.page_ranges:
-            for page in range(start, end):
-                self._download_single_page(page, folder_name_images)
+        """Downloads teletext images for all ranges concurrently, then processes them in page order."""
+        pages = [page for start, end in self.page_ranges for page in range(start, end)]
+        results = asyncio.run(self._download_pages(pages))
+
+        # Pages already known to be uniform are skipped without decoding
+        pending = []
+        for page_str, image_data in results:
+            if image_data is None:
+                continue
+            digest = hashlib.sha256(image_data).hexdigest()
+            if digest in self.uniform_digests:
+                print(f"Skipped uniform color image for page {page_str}")
+                continue
+            pending.append((page_str, digest, image_data))
 
-    def _download_single_page(self, page, folder_name_images):
-        """Downloads and processes a single teletext page."""
+        # Decoding is CPU-bound, so it is spread across worker processes
+        with ProcessPoolExecutor() as pool:
+            decoded = list(
+                pool.map(
+                    _decode_page,
+                    [page_str for page_str, _, _ in pending],
+                    [image_data for _, _, image_data in pending],
+                )
+            )
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            # Loose PNGs are encoded in the background while later pages are processed
+            save_futures = []
+            for (page_str, digest, _), page_data in zip(pending, decoded):
+                if page_data is None:
+                    continue
+                img = self._process_image(page_data, page_str, digest)
+                if img is None:
+                    continue
+                self.page_images.append(img)
+                if self.save_pngs:
+                    img_path = os.path.join(folder_name_images, f"teletext_{page_str}.png")
+                    # The loose PNGs are a convenience copy, so favour encode speed over size
+                    save_futures.append(
+                        executor.submit(
+                            img.save, img_path, format="PNG", compress_level=1, optimize=False
+                        )
+                    )
+                    self.saved_images.append(img_path)
+
+            for future in save_futures:
+                future.result()
+
+    async def _download_pages(self, pages):
+        """Downloads all pages over a shared HTTP/2 client, returning results in page order."""
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            limits=httpx.Limits(max_connections=self.MAX_WORKERS),
+            retries=3,
+        )
+        async with httpx.AsyncClient(transport=transport, timeout=10) as client:
+            return await asyncio.gather(
+                *(self._download_single_page(client, page) for page in pages)
+            )
+
+    async def _download_single_page(self, client, page):
+        """
+        Downloads a single teletext page, trying the fallback page on failure.
+
+        Returns:
+            tuple: The page identifier and the image bytes, or None if the download failed.
+        """
         page_str = str(page)
-        url = self.API_URL_TEMPLATE.format(page=page_str)
 
-        response = self._fetch_url(url)
-        if response is None or response.status_code != 200:
+        status, image_data = await self._fetch_page(client, page_str)
+        if image_data is None:
             fallback_page = f"{page_str}A"
-            fallback_url = self.API_URL_TEMPLATE.format(page=fallback_page)
             print(f"Primary URL failed for page {page_str}; trying fallback {fallback_page}")
-            response = self._fetch_url(fallback_url)
+            status, image_data = await self._fetch_page(client, fallback_page)
             page_str = fallback_page
 
-        if response is not None and response.status_code == 200:
-            self._process_image(response.content, page_str, folder_name_images)
-        else:
-            status = response.status_code if response is not None else 'no-response'
+        if image_data is None:
             print(f"Failed to retrieve page {page_str}: {status}")
+        return page_str, image_data
 
-    def _fetch_url(self, url):
+    async def _fetch_page(self, client, page_str):
+        """
+        Fetches a page image with a conditional request, reusing the cached copy if unchanged.
+
+        Returns:
+            tuple: The response status and the image bytes, or None if the page is unavailable.
+        """
+        url = self.API_URL_TEMPLATE.format(page=page_str)
+        cache_path = os.path.join(self.PAGE_CACHE_DIR, f"{page_str}.webp")
+        cached = self.http_cache.get(page_str) if os.path.exists(cache_path) else None
+
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = await self._fetch_url(client, url, headers)
+        if response is None:
+            return "no-response", None
+
+        if response.status_code == 304 and cached:
+            with open(cache_path, "rb") as f:
+                return response.status_code, f.read()
+
+        if response.status_code != 200:
+            return response.status_code, None
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            with open(cache_path, "wb") as f:
+                f.write(response.content)
+            self.http_cache[page_str] = {"etag": etag, "last_modified": last_modified}
+        return response.status_code, response.content
+
+    async def _fetch_url(self, client, url, headers=None):
         """Fetches a URL and returns the response if successful."""
         try:
-            return requests.get(url, timeout=10)
-        except requests.RequestException as exc:
+            return await client.get(url, headers=headers)
+        except httpx.HTTPError as exc:
             print(f"Request failed for {url}: {exc}")
             return None
 
-    def _process_image(self, image_data, page, folder_name_images):
-        """Processes a downloaded image and saves it if it's not uniform."""
-        try:
-            img = Image.open(BytesIO(image_data))
-        except Exception as exc:
-            print(f"Failed to open image for page {page}: {exc}")
-            return
-
-        img = img.convert("L")
+    def _process_image(self, page_data, page, digest):
+        """
+        Turns a decoded page into the final image with its page number.
 
-        # Apply binarization
-        threshold = 128
-        img = img.point(lambda p: 255 if p > threshold else 0)
-        img = ImageOps.invert(img)
+        Returns:
+            PIL.Image or None: The processed page, or None if it is uniform.
+        """
+        size, pixels = page_data
+        img = Image.frombytes("1", size, pixels)
 
         # Check if image is uniform
-        pixels = list(img.getdata())
-        if pixels and all(pixel == pixels[0] for pixel in pixels):
+        if self._is_uniform(img):
+            self.uniform_digests.add(digest)
             print(f"Skipped uniform color image for page {page}")
-            return
+            return None
 
         # Add page number and padding
         img = self._add_page_number(img, page)
-        img = self._add_padding(img)
+        return self._add_padding(img)
 
-        # Save image
-        img_path = os.path.join(folder_name_images, f"teletext_{page}.png")
-        img.save(img_path, format="PNG")
-        self.saved_images.append(img_path)
+    def _is_uniform(self, img):
+        """Returns True if every pixel of the image has the same value."""
+        pixels = np.asarray(img)
+        if not pixels.size:
+            return False
+
+        # Compare row by row so non-uniform pages bail out at the first differing row
+        first_pixel = pixels.flat[0]
+        return not any(np.not_equal(row, first_pixel).any() for row in pixels)
 
     def _add_page_number(self, img, page):
         """Adds a page number to the bottom of the image."""
         extra_height = 20
-        new_img = Image.new("L", (img.width, img.height + extra_height), 255)
-        new_img.paste(img, (0, 0))
-
-        draw = ImageDraw.Draw(new_img)
-        try:
-            font = ImageFont.truetype("arial.ttf", 12)
-        except:
-            font = ImageFont.load_default()
+        new_img = ImageOps.expand(img, border=(0, 0, 0, extra_height), fill=255)
 
-        text = f"Page {page}"
-        bbox = font.getbbox(text)
-        text_width, text_height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        # Compose the text from prerendered glyphs instead of rasterizing it per page
+        glyphs = [self._get_glyph(char) for char in f"Page {page}"]
+        text_width = sum(advance for advance, _ in glyphs)
         x = (new_img.width - text_width) // 2
-        y = img.height + (extra_height - text_height) // 2
-        draw.text((x, y), text, font=font, fill=0)
+        y = img.height + (extra_height - self.text_height) // 2
+        for advance, mask in glyphs:
+            new_img.paste(0, (int(x), y), mask)
+            x += advance
 
         return new_img
 
+    def _get_glyph(self, char):
+        """Returns the advance width and rendered mask of a page number character."""
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            _, _, right, bottom = self.font.getbbox(char, mode="1")
+            mask = Image.new("1", (max(right, 1), max(bottom, 1)), 0)
+            ImageDraw.Draw(mask).text((0, 0), char, font=self.font, fill=1)
+            glyph = (self.font.getlength(char, mode="1"), mask)
+            self.glyphs[char] = glyph
+        return glyph
+
     def _add_padding(self, img):
         """Adds padding around the image."""
         padding = 10
-        padded_img = Image.new(
-            "L", (img.width + 2 * padding, img.height + 2 * padding), 255
-        )
-        padded_img.paste(img, (padding, padding))
-        return padded_img
+        return ImageOps.expand(img, border=padding, fill=255)
 
-    def _create_pdf(self, folder_name):
+    def _create_pdf(self, folder_name, now):
         """Creates a PDF from all saved images."""
-        date_str = datetime.now().strftime("%d.%m.%Y")
+        date_str = now.strftime("%d.%m.%Y")
         pdf_filename = f"Teletext {date_str}.pdf"
         pdf_path = os.path.join(folder_name, pdf_filename)
 
         # Generate first page with greeting
         first_page_gen = FirstPageGenerator()
-        first_page = first_page_gen.generate_first_page().convert("RGB")
+        first_page = first_page_gen.generate_first_page()
 
         # Generate map page
         map_page_gen = MapPageGenerator()
-        map_page = map_page_gen.generate_map_page().convert("RGB")
+        map_page = map_page_gen.generate_map_page()
 
         # Generate wikipedia pages
         wiki_en_gen = WikiPageGenerator(lang="en")
-        wiki_en_page = wiki_en_gen.generate_wiki_page().convert("RGB")
+        wiki_en_page = wiki_en_gen.generate_wiki_page()
         
         wiki_cs_gen = WikiPageGenerator(lang="cs")
-        wiki_cs_page = wiki_cs_gen.generate_wiki_page().convert("RGB")
+        wiki_cs_page = wiki_cs_gen.generate_wiki_page()
 
-        # Combine first page, images, and appendix pages
+        # Combine first page, images, and appendix pages. The generated pages are
+        # grayscale and teletext pages are 1-bit, which Pillow stores with CCITT
+        # Group 4 compression.
         image_objs = [first_page]
-        if self.saved_images:
-            image_objs += [
-                Image.open(img_path).convert("RGB") for img_path in self.saved_images
-            ]
+        image_objs += self.page_images
         image_objs += [map_page, wiki_en_page, wiki_cs_page]
         
         image_objs[0].save(pdf_path, save_all=True, append_images=image_objs[1:])
         
-        if not self.saved_images:
+        if not self.page_images:
             print(f"No teletext images saved, but PDF created at {pdf_path} (first page, map, wiki).")
         else:
             print(f"PDF created at {pdf_path}")
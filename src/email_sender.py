@@ -1,7 +1,9 @@
+import asyncio
 import os
-import smtplib
 from email.message import EmailMessage
 
+import aiosmtplib
+
 
 class EmailSender:
     """Handles sending emails with PDF attachments."""
@@ -26,7 +28,7 @@ class EmailSender:
         body="Please find the attached PDF.",
     ):
         """
-        Sends a PDF file as an email attachment using SMTP over SSL.
+        Sends a PDF file as an email attachment using SMTP over TLS.
 
         Args:
             pdf_path (str): Path to the PDF file to be sent.
@@ -34,28 +36,65 @@ class EmailSender:
             subject (str, optional): Subject of the email. Defaults to "Teletext PDF".
             body (str, optional): Body text of the email. Defaults to "Please find the attached PDF.".
         """
+        self.send_pdfs([pdf_path], recipient_email, subject=subject, body=body)
+
+    def send_pdfs(
+        self,
+        pdf_paths,
+        recipient_email,
+        subject="Teletext PDF",
+        body="Please find the attached PDF.",
+    ):
+        """
+        Sends each PDF file as a separate email over a single SMTP connection.
+
+        Args:
+            pdf_paths (list[str]): Paths to the PDF files to be sent.
+            recipient_email (str): Email address of the recipient.
+            subject (str, optional): Subject of the emails. Defaults to "Teletext PDF".
+            body (str, optional): Body text of the emails. Defaults to "Please find the attached PDF.".
+        """
         if self.dry_run:
-            print(
-                f"[DRY RUN] Email would be sent to {recipient_email} with attachment {pdf_path}"
-            )
+            for pdf_path in pdf_paths:
+                print(
+                    f"[DRY RUN] Email would be sent to {recipient_email} with attachment {pdf_path}"
+                )
             return
 
+        asyncio.run(self._send_messages(pdf_paths, recipient_email, subject, body))
+
+    async def _send_messages(self, pdf_paths, recipient_email, subject, body):
+        """Sends one message per PDF file over a single logged-in connection."""
+        async with self._open_smtp() as smtp:
+            for pdf_path in pdf_paths:
+                msg = self._build_message(pdf_path, recipient_email, subject, body)
+                await smtp.send_message(msg)
+                print(f"Email sent to {recipient_email} with attachment {pdf_path}")
+
+    def _open_smtp(self):
+        """Creates an SMTP over TLS client that logs in as the sender once connected."""
+        return aiosmtplib.SMTP(
+            hostname=self.SMTP_SERVER,
+            port=self.SMTP_PORT,
+            use_tls=True,
+            username=self.sender_email,
+            password=self.sender_password,
+        )
+
+    def _build_message(self, pdf_path, recipient_email, subject, body):
+        """Builds an email message with the PDF file attached."""
         msg = EmailMessage()
         msg["From"] = self.sender_email
         msg["To"] = recipient_email
         msg["Subject"] = subject
         msg.set_content(body)
 
+        # Pass the file contents straight through so no extra reference keeps them alive
         with open(pdf_path, "rb") as f:
-            pdf_data = f.read()
             msg.add_attachment(
-                pdf_data,
+                f.read(),
                 maintype="application",
                 subtype="pdf",
                 filename=os.path.basename(pdf_path),
             )
-
-        with smtplib.SMTP_SSL(self.SMTP_SERVER, self.SMTP_PORT) as smtp:
-            smtp.login(self.sender_email, self.sender_password)
-            smtp.send_message(msg)
-            print(f"Email sent to {recipient_email} with attachment {pdf_path}")
+        return msg
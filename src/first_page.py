@@ -1,6 +1,7 @@
 import datetime
 import json
-import urllib.request
+
+import urllib3
 
 from PIL import (
     Image,
@@ -16,15 +17,22 @@ class FirstPageGenerator:
         self.greeting_text = greeting_text
         self.width = width
         self.height = height
+        # Several lookups hit the same hosts, so their connections are pooled and reused
+        self.http = urllib3.PoolManager()
+
+    def _fetch(self, url, user_agent='Mozilla/5.0'):
+        """Fetches a URL over the shared connection pool and returns the response body."""
+        res = self.http.request("GET", url, headers={'User-Agent': user_agent})
+        if res.status != 200:
+            raise urllib3.exceptions.HTTPError(f"HTTP {res.status} for {url}")
+        return res.data
 
     def _fetch_weather(self):
         """Fetches weather forecast for Prague using OpenMeteo API."""
         url = "https://api.open-meteo.com/v1/forecast?latitude=50.1044903&longitude=14.3913725&daily=weather_code,temperature_2m_max,temperature_2m_min&timezone=Europe%2FBerlin&forecast_days=3"
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
         try:
-            with urllib.request.urlopen(req) as res:
-                data = json.loads(res.read())
-                return data.get('daily', {})
+            data = json.loads(self._fetch(url))
+            return data.get('daily', {})
         except Exception as e:
             print(f"Error fetching weather: {e}")
             return None
@@ -36,11 +44,9 @@ class FirstPageGenerator:
         for i in range(3):
             target_date = base_date + datetime.timedelta(days=i)
             url = f"https://svatkyapi.cz/api/day/{target_date.year}-{target_date.month:02d}-{target_date.day:02d}"
-            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
             try:
-                with urllib.request.urlopen(req) as res:
-                    data = json.loads(res.read())
-                    days.append(data.get('name', 'Neznámý'))
+                data = json.loads(self._fetch(url))
+                days.append(data.get('name', 'Neznámý'))
             except Exception as e:
                 print(f"Error fetching namesday: {e}")
                 days.append('Chyba')
@@ -49,52 +55,46 @@ class FirstPageGenerator:
     def _fetch_btc_price(self):
         """Fetches current Bitcoin price in USD and 3-day trend from Yahoo Finance."""
         url = "https://query1.finance.yahoo.com/v8/finance/chart/BTC-USD?range=5d&interval=1d"
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
         try:
-            with urllib.request.urlopen(req) as res:
-                data = json.loads(res.read())
-                closes = data['chart']['result'][0]['indicators']['quote'][0]['close']
-                valid_closes = [c for c in closes if c is not None]
-                if len(valid_closes) >= 4:
-                    price_3d_ago = float(valid_closes[-4])
-                else:
-                    price_3d_ago = float(valid_closes[0]) if valid_closes else 0.0
-                
-                regular_price = float(data['chart']['result'][0]['meta']['regularMarketPrice'])
-                
-                if price_3d_ago:
-                    trend = "↑" if regular_price > price_3d_ago else "↓" if regular_price < price_3d_ago else "→"
-                else:
-                    trend = ""
-                return regular_price, trend
+            data = json.loads(self._fetch(url, 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'))
+            closes = data['chart']['result'][0]['indicators']['quote'][0]['close']
+            valid_closes = [c for c in closes if c is not None]
+            if len(valid_closes) >= 4:
+                price_3d_ago = float(valid_closes[-4])
+            else:
+                price_3d_ago = float(valid_closes[0]) if valid_closes else 0.0
+            
+            regular_price = float(data['chart']['result'][0]['meta']['regularMarketPrice'])
+            
+            if price_3d_ago:
+                trend = "↑" if regular_price > price_3d_ago else "↓" if regular_price < price_3d_ago else "→"
+            else:
+                trend = ""
+            return regular_price, trend
         except Exception as e:
             print(f"Error fetching BTC: {e}")
             return None, ""
     def _fetch_eunl_price(self):
         """Fetches current EUNL ETF price in EUR and 3-day trend from Yahoo Finance."""
         url = "https://query1.finance.yahoo.com/v8/finance/chart/EUNL.DE?range=1mo&interval=1d"
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
         try:
-            with urllib.request.urlopen(req) as res:
-                data = json.loads(res.read())
-                closes = data['chart']['result'][0]['indicators']['quote'][0]['close']
-                valid_closes = [c for c in closes if c is not None]
-                if len(valid_closes) >= 4:
-                    current_price = float(valid_closes[-1])
-                    price_3d_ago = float(valid_closes[-4])
-                    trend = "↑" if current_price > price_3d_ago else "↓" if current_price < price_3d_ago else "→"
-                else:
-                    current_price = float(valid_closes[-1]) if valid_closes else 0.0
-                    trend = ""
-                
-                exact_price_url = "https://query1.finance.yahoo.com/v8/finance/chart/EUNL.DE"
-                req_ext = urllib.request.Request(exact_price_url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
-                with urllib.request.urlopen(req_ext) as res_ext:
-                    data_ext = json.loads(res_ext.read())
-                    regular_price = float(data_ext['chart']['result'][0]['meta']['regularMarketPrice'])
-                    if len(valid_closes) >= 4:
-                        trend = "↑" if regular_price > price_3d_ago else "↓" if regular_price < price_3d_ago else "→"
-                    return regular_price, trend
+            data = json.loads(self._fetch(url, 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'))
+            closes = data['chart']['result'][0]['indicators']['quote'][0]['close']
+            valid_closes = [c for c in closes if c is not None]
+            if len(valid_closes) >= 4:
+                current_price = float(valid_closes[-1])
+                price_3d_ago = float(valid_closes[-4])
+                trend = "↑" if current_price > price_3d_ago else "↓" if current_price < price_3d_ago else "→"
+            else:
+                current_price = float(valid_closes[-1]) if valid_closes else 0.0
+                trend = ""
+            
+            exact_price_url = "https://query1.finance.yahoo.com/v8/finance/chart/EUNL.DE"
+            data_ext = json.loads(self._fetch(exact_price_url, 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'))
+            regular_price = float(data_ext['chart']['result'][0]['meta']['regularMarketPrice'])
+            if len(valid_closes) >= 4:
+                trend = "↑" if regular_price > price_3d_ago else "↓" if regular_price < price_3d_ago else "→"
+            return regular_price, trend
         except Exception as e:
             print(f"Error fetching EUNL: {e}")
             return None, ""
@@ -103,15 +103,13 @@ class FirstPageGenerator:
         """Fetches current CZK/EUR and CZK/PLN exchange rates from CNB."""
         url = "https://www.cnb.cz/cs/financni-trhy/devizovy-trh/kurzy-devizoveho-trhu/kurzy-devizoveho-trhu/denni_kurz.txt"
         rates = {"EUR": None, "PLN": None}
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
         try:
-            with urllib.request.urlopen(req) as res:
-                lines = res.read().decode('utf-8').split('\n')
-                for line in lines:
-                    if '|EUR|' in line:
-                        rates['EUR'] = float(line.split('|')[-1].replace(',', '.'))
-                    elif '|PLN|' in line:
-                        rates['PLN'] = float(line.split('|')[-1].replace(',', '.'))
+            lines = self._fetch(url).decode('utf-8').split('\n')
+            for line in lines:
+                if '|EUR|' in line:
+                    rates['EUR'] = float(line.split('|')[-1].replace(',', '.'))
+                elif '|PLN|' in line:
+                    rates['PLN'] = float(line.split('|')[-1].replace(',', '.'))
         except Exception as e:
             print(f"Error fetching exchange rates: {e}")
         return rates